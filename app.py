@@ -3,10 +3,18 @@ from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
 import os
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
+import threading
 from config import Config
 from utils.audio_processor import AudioProcessor
+from utils.transcription import ENGINES, MODEL_TIERS
+from utils import chunked_upload
+from utils.storage_manager import StorageManager, SOURCE, INTERMEDIATE
+from utils.http_cache import (
+    ResponseCache, cached_response, content_version, directory_version,
+    init_compression, init_static_caching
+)
 from utils.ai_summarizer import AISummarizer
 from utils.google_meet_bot import GoogleMeetBot
 
@@ -38,9 +46,70 @@ class Meeting(db.Model):
             'ai_output': json.loads(self.ai_output) if self.ai_output else None
         }
 
+class MeetingFile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.String(36), db.ForeignKey('meeting.id'), nullable=False, index=True)
+    path = db.Column(db.String(500), nullable=False, unique=True)
+    kind = db.Column(db.String(20), nullable=False, default='source')  # source or intermediate
+    size = db.Column(db.BigInteger, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Upload(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    offset = db.Column(db.BigInteger, nullable=False, default=0)
+    # Set while one request (in any worker) is writing or finalizing the upload
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    status = db.Column(db.String(20), nullable=False, default='uploading')  # uploading, processing, failed, complete
+    meeting_id = db.Column(db.String(36))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        status, error = self.status, self.error
+        # A finalizer whose process died stops heartbeating; report it so clients retry
+        stale = datetime.utcnow() - timedelta(seconds=app.config['UPLOAD_FINALIZE_TIMEOUT'])
+        if status == 'processing' and (self.claim_token is None or self.claimed_at < stale):
+            status, error = 'failed', error or 'Processing was interrupted'
+        return {
+            'upload_id': self.id,
+            'filename': self.filename,
+            'size': self.total_size,
+            'offset': self.offset,
+            'chunk_size': app.config['UPLOAD_CHUNK_SIZE'],
+            'status': status,
+            'meeting_id': self.meeting_id,
+            'error': error
+        }
+
 # Initialize AI Summarizer
 ai_summarizer = AISummarizer()
 
+# Initialize storage lifecycle manager
+storage_manager = StorageManager(app, db, Meeting, MeetingFile, Upload)
+if app.config['STORAGE_GC_ENABLED']:
+    storage_manager.start()
+
+# Initialize response caching and compression
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'])
+template_version = directory_version(os.path.join(app.root_path, app.template_folder))
+init_static_caching(app)
+init_compression(app)
+
+def meeting_version(meeting_id):
+    """Content version of a saved meeting without loading its transcript, or None if it is gone"""
+    row = db.session.query(Meeting.id, Meeting.created_at).filter_by(id=meeting_id).first()
+    if row is None:
+        # Deleted, possibly by another worker
+        response_cache.invalidate(f'meeting:{meeting_id}', f'api-meeting:{meeting_id}')
+        return None
+    # Meetings never change after they are saved, so id + creation time identify the content
+    return content_version(row.id, row.created_at.isoformat(), template_version)
+
 # Routes
 @app.route('/')
 def index():
@@ -56,65 +125,328 @@ def create_meeting():
         title = request.form.get('title', 'Untitled Meeting')
         meeting_type = request.form.get('type', 'Team meeting')
         transcript = request.form.get('transcript', '')
+        engine = request.form.get('engine') or None
+        model_size = request.form.get('model_size') or None
+        
+        error = validate_transcription_options(engine, model_size)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
         file_path = None
-        transcript_text = transcript
         
         # Handle file upload
         if 'file' in request.files:
             file = request.files['file']
             if file.filename != '':
                 filename = secure_filename(file.filename)
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                # Prefixed like chunked uploads so same-named recordings never collide
+                file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex[:8]}_{filename}")
                 file.save(file_path)
-                
-                # Extract transcript from audio/video
-                if filename.lower().endswith(('.mp3', '.wav', '.mp4', '.m4a')):
-                    processor = AudioProcessor()
-                    transcript_text = processor.extract_transcript(file_path)
         
-        # Generate summary using AI
-        if transcript_text:
-            ai_result = ai_summarizer.generate_summary(transcript_text, meeting_type)
-        else:
-            ai_result = {
-                "summary": "No transcript provided.",
-                "key_points": [],
-                "decisions": [],
-                "action_items": [],
-                "agenda": []
-            }
+        return process_meeting(title, meeting_type, transcript, file_path, engine, model_size)
         
-        # Save to database
-        meeting = Meeting(
-            title=title,
-            meeting_type=meeting_type,
-            transcript=transcript_text,
-            file_path=file_path,
-            ai_output=json.dumps(ai_result)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def validate_transcription_options(engine, model_size):
+    """Return an error message for unknown engine/model size values"""
+    if engine and engine not in ENGINES:
+        return f'Unknown transcription engine: {engine}'
+    if model_size and model_size != 'auto' and model_size not in MODEL_TIERS:
+        return f'Unknown model size: {model_size}'
+    return None
+
+def process_meeting(title, meeting_type, transcript_text, file_path, engine=None, model_size=None):
+    """Transcribe, summarize and save a meeting, returning the JSON response"""
+    meeting, ai_result = save_meeting(title, meeting_type, transcript_text, file_path, engine, model_size)
+    return jsonify({
+        'success': True,
+        'meeting_id': meeting.id,
+        'result': ai_result
+    })
+
+def save_meeting(title, meeting_type, transcript_text, file_path, engine=None, model_size=None, upload=None):
+    """Transcribe an uploaded recording (if any), summarize and save the meeting"""
+    # Extract transcript from audio/video
+    intermediate_files = []
+    if file_path and file_path.lower().endswith(('.mp3', '.wav', '.mp4', '.m4a')):
+        processor = AudioProcessor(engine, model_size, meeting_type)
+        with storage_manager.pin(file_path):
+            transcript_text = processor.extract_transcript(file_path)
+        intermediate_files = processor.intermediate_files
+    
+    # Generate summary using AI
+    if transcript_text:
+        ai_result = ai_summarizer.generate_summary(transcript_text, meeting_type)
+    else:
+        ai_result = {
+            "summary": "No transcript provided.",
+            "key_points": [],
+            "decisions": [],
+            "action_items": [],
+            "agenda": []
+        }
+    
+    # Save to database
+    meeting = Meeting(
+        title=title,
+        meeting_type=meeting_type,
+        transcript=transcript_text,
+        file_path=file_path,
+        ai_output=json.dumps(ai_result)
+    )
+    
+    db.session.add(meeting)
+    db.session.flush()
+    
+    # Track stored files so the storage manager can expire and clean them up
+    storage_manager.track(meeting.id, file_path, SOURCE)
+    for path in intermediate_files:
+        storage_manager.track(meeting.id, path, INTERMEDIATE)
+    # A chunked upload is marked complete in the same transaction as the meeting it produced
+    if upload is not None:
+        upload.status = 'complete'
+        upload.meeting_id = meeting.id
+        upload.error = None
+        upload.claim_token = None
+        upload.claimed_at = None
+    db.session.commit()
+    storage_manager.remove_intermediates(meeting.id)
+    
+    return meeting, ai_result
+
+# Resumable chunked uploads: create -> PUT ranges -> (GET/HEAD offset to resume) -> complete
+def claim_upload(upload_id, offset, lease_seconds):
+    """Atomically claim an upload at the given committed offset, across all workers.
+
+    Returns a claim token, or None if the offset moved or another request holds a live claim.
+    """
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+    claimed = Upload.query.filter(
+        Upload.id == upload_id,
+        Upload.offset == offset,
+        db.or_(Upload.claim_token.is_(None), Upload.claimed_at < now - timedelta(seconds=lease_seconds))
+    ).update({'claim_token': token, 'claimed_at': now}, synchronize_session=False)
+    db.session.commit()
+    return token if claimed else None
+
+def release_upload(upload_id, token, **values):
+    """Drop a claim, optionally updating columns; False if the claim was lost meanwhile"""
+    released = Upload.query.filter_by(id=upload_id, claim_token=token).update(
+        {'claim_token': None, 'claimed_at': None, **values}, synchronize_session=False
+    )
+    db.session.commit()
+    return bool(released)
+
+def upload_conflict(upload, error):
+    db.session.refresh(upload)
+    return jsonify({'success': False, 'error': error, 'offset': upload.offset}), 409
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    data = request.json or {}
+    filename = data.get('filename')
+    size = data.get('size')
+    
+    if isinstance(filename, str):
+        filename = secure_filename(filename)
+    if not filename or not isinstance(filename, str):
+        return jsonify({'success': False, 'error': 'Filename required'}), 400
+    # bool is a subclass of int, so `true` would otherwise create a 1-byte upload
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return jsonify({'success': False, 'error': 'Size must be a positive integer'}), 400
+    if size > app.config['MAX_UPLOAD_SIZE']:
+        return jsonify({'success': False, 'error': 'File is too large'}), 413
+    
+    # Every outstanding upload holds its full size on disk, so cap the total reservation
+    reserved = db.session.query(db.func.coalesce(db.func.sum(Upload.total_size), 0)).filter(
+        Upload.status != 'complete'
+    ).scalar()
+    if not chunked_upload.has_space_for(app.config['UPLOAD_FOLDER'], size, reserved,
+                                        app.config['MAX_RESERVED_UPLOAD_BYTES'],
+                                        app.config['UPLOAD_MIN_FREE_BYTES']):
+        return jsonify({'success': False, 'error': 'Not enough storage for this upload'}), 507
+    
+    upload = Upload(filename=filename, total_size=size)
+    upload.id = str(uuid.uuid4())
+    upload.file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{upload.id}.part")
+    chunked_upload.preallocate(upload.file_path, size)
+    
+    db.session.add(upload)
+    db.session.commit()
+    
+    return jsonify({'success': True, **upload.to_dict()}), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    # Flask answers HEAD from this view too, so clients can read Upload-Offset cheaply
+    upload = Upload.query.get_or_404(upload_id)
+    response = jsonify({'success': True, **upload.to_dict()})
+    response.headers['Upload-Offset'] = str(upload.offset)
+    return response
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    upload = Upload.query.get_or_404(upload_id)
+    
+    try:
+        start, end, total = chunked_upload.parse_content_range(request.headers.get('Content-Range', ''))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if total != upload.total_size:
+        return jsonify({'success': False, 'error': 'Content-Range total does not match upload size'}), 400
+    
+    # Chunks must arrive in order; the claim only succeeds if `start` is the committed offset
+    token = claim_upload(upload.id, start, app.config['UPLOAD_CLAIM_TIMEOUT'])
+    if token is None:
+        return upload_conflict(upload, 'Unexpected offset or upload is busy')
+    
+    written = 0
+    try:
+        written = chunked_upload.write_chunk(
+            upload.id, upload.file_path, start, request.stream, end - start + 1
         )
+    finally:
+        released = release_upload(upload.id, token, offset=start + written)
+    if not released:
+        return upload_conflict(upload, 'Upload claim expired')
+    
+    response = jsonify({'success': True, 'offset': start + written})
+    response.headers['Upload-Offset'] = str(start + written)
+    return response
+
+def upload_status(upload, status_code=200):
+    db.session.refresh(upload)
+    data = upload.to_dict()
+    response = jsonify({'success': data['status'] != 'failed', **data})
+    response.headers['Location'] = f'/api/uploads/{upload.id}'
+    return response, status_code
+
+def run_finalize(upload_id, token, title, meeting_type, transcript, engine, model_size):
+    """Background job: transcribe and summarize a finished upload while keeping its claim alive"""
+    stop = threading.Event()
+    
+    def heartbeat():
+        # A live finalizer keeps refreshing claimed_at; a dead one stops, so retries
+        # are only blocked for UPLOAD_FINALIZE_TIMEOUT
+        while not stop.wait(app.config['UPLOAD_CLAIM_HEARTBEAT']):
+            with app.app_context():
+                Upload.query.filter_by(id=upload_id, claim_token=token).update(
+                    {'claimed_at': datetime.utcnow()}, synchronize_session=False
+                )
+                db.session.commit()
+    
+    threading.Thread(target=heartbeat, name=f'upload-heartbeat-{upload_id[:8]}', daemon=True).start()
+    with app.app_context():
+        try:
+            upload = db.session.get(Upload, upload_id)
+            save_meeting(title, meeting_type, transcript, upload.file_path, engine, model_size, upload=upload)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Finalizing upload {upload_id} failed: {e}")
+            release_upload(upload_id, token, status='failed', error=str(e))
+        finally:
+            stop.set()
+            # No-op after success or a handled failure; frees the claim on any other exit
+            db.session.rollback()
+            release_upload(upload_id, token, status='failed', error='Processing was interrupted')
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    upload = Upload.query.get_or_404(upload_id)
+    
+    data = request.json or {}
+    title = data.get('title') or 'Untitled Meeting'
+    meeting_type = data.get('type') or 'Team meeting'
+    engine = data.get('engine') or None
+    model_size = data.get('model_size') or None
+    
+    if upload.status == 'complete':
+        return upload_status(upload)
+    error = validate_transcription_options(engine, model_size)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    if upload.offset != upload.total_size:
+        return jsonify({'success': False, 'error': 'Upload is incomplete', 'offset': upload.offset}), 409
+    
+    token = claim_upload(upload.id, upload.total_size, app.config['UPLOAD_FINALIZE_TIMEOUT'])
+    if token is None:
+        # Another request is already finalizing it; the client just polls for the result
+        return upload_status(upload, 202)
+    
+    try:
+        digest = chunked_upload.finalize(upload.id, upload.file_path, upload.offset)
+        expected = data.get('sha256')
+        if expected and expected.lower() != digest:
+            release_upload(upload.id, token)
+            return jsonify({'success': False, 'error': 'Checksum mismatch', 'sha256': digest}), 422
         
-        db.session.add(meeting)
+        # Keep the upload row (pointing at the final file) so a failed transcription
+        # can be retried without re-sending the recording
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{upload.id[:8]}_{upload.filename}")
+        if upload.file_path != file_path:
+            os.replace(upload.file_path, file_path)
+            upload.file_path = file_path
+        upload.status = 'processing'
+        upload.error = None
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'meeting_id': meeting.id,
-            'result': ai_result
-        })
-        
-    except Exception as e:
+        # Transcription can take far longer than a request may, so it runs in the background
+        threading.Thread(
+            target=run_finalize,
+            args=(upload.id, token, title, meeting_type, data.get('transcript', ''), engine, model_size),
+            name=f'upload-finalize-{upload.id[:8]}',
+            daemon=True
+        ).start()
+    except BaseException as e:
+        db.session.rollback()
+        release_upload(upload.id, token)
+        if not isinstance(e, Exception):
+            raise
         return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return upload_status(upload, 202)
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    upload = Upload.query.get_or_404(upload_id)
+    
+    chunked_upload.discard(upload.id)
+    if os.path.exists(upload.file_path):
+        os.remove(upload.file_path)
+    
+    db.session.delete(upload)
+    db.session.commit()
+    
+    return jsonify({'success': True})
 
 @app.route('/meeting/<meeting_id>')
 def view_meeting(meeting_id):
-    meeting = Meeting.query.get_or_404(meeting_id)
-    return render_template('result.html', meeting=meeting.to_dict())
+    version = meeting_version(meeting_id)
+    if version is None:
+        abort(404)
+    storage_manager.touch(meeting_id)
+    
+    def render():
+        meeting = Meeting.query.get_or_404(meeting_id)
+        return render_template('result.html', meeting=meeting.to_dict())
+    
+    return cached_response(response_cache, f'meeting:{meeting_id}', version, render,
+                           'text/html', app.config['COMPRESS_MIN_SIZE'])
 
 @app.route('/history')
 def history():
-    meetings = Meeting.query.order_by(Meeting.created_at.desc()).all()
-    return render_template('history.html', meetings=meetings)
+    # Any create or delete changes the count or the newest timestamp
+    count, latest = db.session.query(db.func.count(Meeting.id), db.func.max(Meeting.created_at)).one()
+    version = content_version(count, latest, template_version)
+    
+    def render():
+        meetings = Meeting.query.order_by(Meeting.created_at.desc()).all()
+        return render_template('history.html', meetings=meetings)
+    
+    return cached_response(response_cache, 'history', version, render,
+                           'text/html', app.config['COMPRESS_MIN_SIZE'])
 
 @app.route('/api/meetings', methods=['GET'])
 def get_meetings():
@@ -123,25 +455,56 @@ def get_meetings():
 
 @app.route('/api/meetings/<meeting_id>', methods=['GET'])
 def get_meeting(meeting_id):
-    meeting = Meeting.query.get_or_404(meeting_id)
-    return jsonify(meeting.to_dict())
+    version = meeting_version(meeting_id)
+    if version is None:
+        abort(404)
+    storage_manager.touch(meeting_id)
+    
+    def render():
+        meeting = Meeting.query.get_or_404(meeting_id)
+        # Same serializer as jsonify, so cached and uncached endpoints match byte for byte
+        return app.json.response(meeting.to_dict()).get_data(as_text=True)
+    
+    return cached_response(response_cache, f'api-meeting:{meeting_id}', version, render,
+                           'application/json', app.config['COMPRESS_MIN_SIZE'])
 
 @app.route('/api/meetings/<meeting_id>', methods=['DELETE'])
 def delete_meeting(meeting_id):
     meeting = Meeting.query.get_or_404(meeting_id)
     
-    # Delete associated file
-    if meeting.file_path and os.path.exists(meeting.file_path):
-        os.remove(meeting.file_path)
+    # Delete associated files
+    storage_manager.delete_meeting_files(meeting)
     
     db.session.delete(meeting)
     db.session.commit()
+    response_cache.invalidate(f'meeting:{meeting_id}', f'api-meeting:{meeting_id}', 'history')
     
     return jsonify({'success': True})
 
+@app.route('/api/storage', methods=['GET'])
+def storage_status():
+    return jsonify({
+        'usage_bytes': storage_manager.usage(),
+        'quota_bytes': app.config['STORAGE_QUOTA_BYTES'],
+        'retention_days': app.config['STORAGE_RETENTION_DAYS'],
+        'last_report': storage_manager.last_report
+    })
+
+@app.route('/api/storage/gc', methods=['POST'])
+def storage_gc():
+    try:
+        report = storage_manager.collect()
+        if report is None:
+            return jsonify({'success': False, 'error': 'Garbage collection is already running'}), 409
+        return jsonify({'success': True, 'report': report})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/download/<meeting_id>/<format>')
 def download_summary(meeting_id, format):
     meeting = Meeting.query.get_or_404(meeting_id)
+    storage_manager.touch(meeting.id)
     
     if format == 'txt':
         content = generate_text_summary(meeting)
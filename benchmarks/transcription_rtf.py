@@ -0,0 +1,52 @@
+"""Report real-time factor (processing time / audio duration) per transcription engine and tier.
+
+Usage:
+    python -m benchmarks.transcription_rtf clip1.wav clip2.wav --engines whisper faster-whisper --tiers tiny base
+"""
+import argparse
+import time
+from utils.transcription import ENGINES, MODEL_TIERS, get_audio_duration, get_engine
+
+
+def benchmark(clips, engines, tiers, repeats=1):
+    """Transcribe every clip with every engine/tier and return (engine, tier, clip, duration, rtf) rows"""
+    rows = []
+    for engine_name in engines:
+        for tier in tiers:
+            engine = get_engine(engine_name, tier)
+            try:
+                # Model loading is cached in production, so keep it out of the timing
+                engine.load()
+            except Exception as e:
+                print(f"Skipping {engine_name}/{tier}: {e}")
+                continue
+
+            for clip in clips:
+                duration = get_audio_duration(clip)
+                if not duration:
+                    continue
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    engine.transcribe(clip)
+                elapsed = (time.perf_counter() - start) / repeats
+                rows.append((engine_name, tier, clip, duration, elapsed / duration))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clips', nargs='+', help='WAV/MP3 clips to transcribe')
+    parser.add_argument('--engines', nargs='+', default=['whisper', 'faster-whisper'], choices=list(ENGINES))
+    parser.add_argument('--tiers', nargs='+', default=['tiny', 'base', 'small'], choices=MODEL_TIERS)
+    parser.add_argument('--repeats', type=int, default=1)
+    args = parser.parse_args()
+
+    rows = benchmark(args.clips, args.engines, args.tiers, args.repeats)
+
+    print(f"{'engine':<16}{'tier':<8}{'duration (s)':>14}{'RTF':>8}  clip")
+    for engine_name, tier, clip, duration, rtf in rows:
+        print(f"{engine_name:<16}{tier:<8}{duration:>14.1f}{rtf:>8.3f}  {clip}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,70 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _json_env(name, default):
+    """Read a JSON value from the environment, falling back to default if it is malformed"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except ValueError as e:
+        print(f"Ignoring invalid {name}: {e}")
+        return default
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     SQLALCHEMY_DATABASE_URI = 'sqlite:///meetings.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    UPLOAD_FOLDER = 'static/uploads'
-    MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max file size
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')  # Kept outside static/ so it is never served
+    MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max request body (single-shot uploads and each chunk)
+    MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 10 * 1024 * 1024 * 1024))  # 10GB max chunked upload
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Chunk size suggested to clients
+    MAX_RESERVED_UPLOAD_BYTES = int(os.getenv('MAX_RESERVED_UPLOAD_BYTES', 50 * 1024 * 1024 * 1024))  # All outstanding uploads, 0 disables
+    UPLOAD_MIN_FREE_BYTES = int(os.getenv('UPLOAD_MIN_FREE_BYTES', 1024 * 1024 * 1024))  # Disk space left after preallocating
+    UPLOAD_CLAIM_TIMEOUT = 10 * 60  # Seconds before a stuck chunk write stops blocking the upload
+    UPLOAD_CLAIM_HEARTBEAT = 30  # Seconds between claim refreshes while an upload is being processed
+    UPLOAD_FINALIZE_TIMEOUT = 5 * 60  # Seconds without a heartbeat before a dead finalizer stops blocking retries
+    UPLOAD_EXPIRY_HOURS = int(os.getenv('UPLOAD_EXPIRY_HOURS', 48))  # Abandoned chunked uploads are removed
+    
+    # Storage lifecycle
+    STORAGE_GC_ENABLED = os.getenv('STORAGE_GC_ENABLED', 'true').lower() == 'true'
+    STORAGE_GC_INTERVAL = int(os.getenv('STORAGE_GC_INTERVAL', 15 * 60))  # Seconds between GC passes
+    STORAGE_QUOTA_BYTES = int(os.getenv('STORAGE_QUOTA_BYTES', 20 * 1024 * 1024 * 1024))  # 0 disables the quota
+    STORAGE_RETENTION_DAYS = int(os.getenv('STORAGE_RETENTION_DAYS', 30))  # Source media kept after transcription, 0 keeps forever
+    STORAGE_ORPHAN_GRACE_SECONDS = int(os.getenv('STORAGE_ORPHAN_GRACE_SECONDS', 6 * 60 * 60))
+    LEGACY_UPLOAD_FOLDERS = ['static/uploads']  # Old, web-served locations migrated into UPLOAD_FOLDER by the GC
+    STORAGE_PIN_TIMEOUT = 24 * 60 * 60  # Pins left by a crashed worker stop protecting files after this
+    STORAGE_TOUCH_INTERVAL = 60 * 60  # Minimum seconds between last_accessed updates of a meeting's media
+    
+    # HTTP caching and compression
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # Bytes; smaller responses are sent as-is
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))  # Rendered pages/JSON kept in memory
+    STATIC_MAX_AGE = 365 * 24 * 60 * 60  # static/ URLs carry a version parameter, so cache them for a year
     
     # AI Configuration
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai')  # openai or gemini
     
+    # Transcription Configuration
+    TRANSCRIPTION_ENGINE = os.getenv('TRANSCRIPTION_ENGINE', 'whisper')  # whisper, faster-whisper or google
+    TRANSCRIPTION_FALLBACK_ENGINE = os.getenv('TRANSCRIPTION_FALLBACK_ENGINE', 'google')
+    TRANSCRIPTION_MODEL_SIZE = os.getenv('TRANSCRIPTION_MODEL_SIZE', 'base')  # tiny..large or auto
+    # JSON object, e.g. {"Standup": "tiny", "Client call": "small"}
+    TRANSCRIPTION_MODEL_BY_MEETING_TYPE = _json_env('TRANSCRIPTION_MODEL_BY_MEETING_TYPE', {})
+    TRANSCRIPTION_COMPUTE_TYPE = os.getenv('TRANSCRIPTION_COMPUTE_TYPE', 'int8')  # faster-whisper only
+    TRANSCRIPTION_CPU_THREADS = int(os.getenv('TRANSCRIPTION_CPU_THREADS', 4))
+    # 'auto' tier selection: start at the ceiling, step down for long audio and a busy queue
+    TRANSCRIPTION_AUTO_MAX_TIER = os.getenv('TRANSCRIPTION_AUTO_MAX_TIER', 'small')
+    TRANSCRIPTION_LONG_AUDIO_SECONDS = int(os.getenv('TRANSCRIPTION_LONG_AUDIO_SECONDS', 30 * 60))
+    TRANSCRIPTION_BUSY_QUEUE_DEPTH = int(os.getenv('TRANSCRIPTION_BUSY_QUEUE_DEPTH', 1))  # Other jobs running in any worker
+    TRANSCRIPTION_JOB_TIMEOUT = 6 * 60 * 60  # Job markers older than this (killed workers) don't count as load
+    TRANSCRIPTION_MODEL_CACHE_SIZE = int(os.getenv('TRANSCRIPTION_MODEL_CACHE_SIZE', 2))  # Models kept loaded per worker
+    
     # Google Meet Bot Configuration
     GOOGLE_ACCOUNT_EMAIL = os.getenv('GOOGLE_ACCOUNT_EMAIL')
     GOOGLE_ACCOUNT_PASSWORD = os.getenv('GOOGLE_ACCOUNT_PASSWORD')
\ No newline at end of file
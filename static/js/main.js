@@ -48,27 +48,104 @@ function createToastContainer() {
     return container;
 }
 
-// File upload preview
-function setupFileUpload() {
-    const fileInput = document.getElementById('fileInput');
-    if (fileInput) {
-        fileInput.addEventListener('change', function(e) {
-            const file = e.target.files[0];
-            if (file) {
-                const fileSize = (file.size / 1024 / 1024).toFixed(2); // MB
-                if (fileSize > 100) {
-                    alert('File size must be less than 100MB');
-                    this.value = '';
-                }
-            }
+function uploadStorageKey(file) {
+    return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+// Resumable chunked upload: progress is kept in localStorage so a reload or
+// dropped connection continues from the last byte the server acknowledged.
+// The caller forgets the upload (forgetUpload) once /complete has succeeded.
+async function uploadFileInChunks(file, onProgress) {
+    const storageKey = uploadStorageKey(file);
+    let upload = null;
+    
+    const savedId = localStorage.getItem(storageKey);
+    if (savedId) {
+        const response = await fetch(`/api/uploads/${savedId}`);
+        if (response.ok) {
+            upload = await response.json();
+        }
+    }
+    
+    if (!upload) {
+        const response = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ filename: file.name, size: file.size })
         });
+        upload = await response.json();
+        if (!upload.success) {
+            throw new Error(upload.error);
+        }
+        localStorage.setItem(storageKey, upload.upload_id);
     }
+    
+    let offset = upload.offset;
+    let retries = 0;
+    while (offset < file.size) {
+        const end = Math.min(offset + upload.chunk_size, file.size);
+        try {
+            const response = await fetch(`/api/uploads/${upload.upload_id}`, {
+                method: 'PUT',
+                headers: {'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`},
+                body: file.slice(offset, end)
+            });
+            const data = await response.json();
+            if (data.offset === undefined || data.offset <= offset) {
+                throw new Error(data.error || 'Upload made no progress');
+            }
+            offset = data.offset;
+            retries = 0;
+        } catch (error) {
+            if (++retries > 5) {
+                throw error;
+            }
+            // Back off, then ask the server where to resume
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            const response = await fetch(`/api/uploads/${upload.upload_id}`);
+            if (response.ok) {
+                offset = (await response.json()).offset;
+            }
+        }
+        if (onProgress) {
+            onProgress(offset / file.size);
+        }
+    }
+    
+    return upload.upload_id;
+}
+
+// Finalize an upload; processing runs in the background, so poll its status until done
+async function finalizeUpload(uploadId, fields) {
+    const response = await fetch(`/api/uploads/${uploadId}/complete`, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(fields)
+    });
+    let data = await response.json();
+    if (response.status !== 202 && response.status !== 200) {
+        return data;
+    }
+    
+    while (data.status === 'processing') {
+        await new Promise(resolve => setTimeout(resolve, 3000));
+        const statusResponse = await fetch(`/api/uploads/${uploadId}`);
+        if (statusResponse.ok) {
+            data = await statusResponse.json();
+        }
+    }
+    if (data.status !== 'complete') {
+        return { success: false, error: data.error || 'Upload could not be processed, please retry' };
+    }
+    return data;
+}
+
+function forgetUpload(file) {
+    localStorage.removeItem(uploadStorageKey(file));
 }
 
 // Initialize when document is ready
 document.addEventListener('DOMContentLoaded', function() {
-    setupFileUpload();
-    
     // Update all dates on page
     document.querySelectorAll('.date-format').forEach(el => {
         if (el.dataset.date) {
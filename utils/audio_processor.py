@@ -1,15 +1,29 @@
-import speech_recognition as sr
 from pydub import AudioSegment
 import moviepy.editor as mp
 import os
-import whisper
+import uuid
 from typing import Optional
+from config import Config
+from utils.transcription import (
+    DEFAULT_MODEL_SIZE, get_engine, get_audio_duration, model_size_for_meeting_type,
+    queue_depth, select_model_tier, track_job, validate_tier
+)
 
 class AudioProcessor:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.whisper_model = whisper.load_model("base")
-    
+    def __init__(self, engine: Optional[str] = None, model_size: Optional[str] = None,
+                 meeting_type: Optional[str] = None):
+        self.config = Config()
+        self.engine_name = engine or self.config.TRANSCRIPTION_ENGINE
+        # Explicit request > per-meeting-type tier > configured default ('auto' picks by load)
+        self.model_size = (
+            model_size
+            or model_size_for_meeting_type(meeting_type)
+            or validate_tier(self.config.TRANSCRIPTION_MODEL_SIZE, 'TRANSCRIPTION_MODEL_SIZE', allow_auto=True)
+            or DEFAULT_MODEL_SIZE
+        )
+        # Files derived from the upload (e.g. converted WAVs) for the storage manager to clean up
+        self.intermediate_files = []
+
     def extract_transcript(self, file_path: str) -> str:
         """Extract transcript from audio/video file"""
         # Convert to wav if needed
@@ -19,37 +33,48 @@ class AudioProcessor:
             audio_path = self._convert_mp3_to_wav(file_path)
         else:
             audio_path = file_path
-        
-        # Use Whisper for transcription
-        try:
-            result = self.whisper_model.transcribe(audio_path)
-            return result["text"]
-        except Exception as e:
-            print(f"Whisper failed: {e}")
-            return self._fallback_transcription(audio_path)
-    
+
+        with track_job() as job_id:
+            model_size = self._resolve_model_size(audio_path, job_id)
+            try:
+                engine = get_engine(self.engine_name, model_size)
+                return engine.transcribe(audio_path)
+            except Exception as e:
+                print(f"{self.engine_name} ({model_size}) failed: {e}")
+                return self._fallback_transcription(audio_path, model_size)
+
+    def _resolve_model_size(self, audio_path: str, job_id: str) -> str:
+        """Turn 'auto' into a concrete tier based on audio duration and the other running jobs"""
+        if self.model_size != 'auto':
+            return self.model_size
+        return select_model_tier(get_audio_duration(audio_path), queue_depth(exclude=job_id))
+
+    def _intermediate_path(self, source_path: str) -> str:
+        """Unique WAV path next to the source, so conversions never overwrite another upload"""
+        return os.path.join(os.path.dirname(source_path), f"{uuid.uuid4().hex}.wav")
+
     def _convert_video_to_audio(self, video_path: str) -> str:
         """Convert video file to audio"""
-        audio_path = video_path.replace('.mp4', '.wav')
+        audio_path = self._intermediate_path(video_path)
         video = mp.VideoFileClip(video_path)
         video.audio.write_audiofile(audio_path)
+        self.intermediate_files.append(audio_path)
         return audio_path
-    
+
     def _convert_mp3_to_wav(self, mp3_path: str) -> str:
         """Convert MP3 to WAV format"""
-        wav_path = mp3_path.replace('.mp3', '.wav')
+        wav_path = self._intermediate_path(mp3_path)
         audio = AudioSegment.from_mp3(mp3_path)
         audio.export(wav_path, format="wav")
+        self.intermediate_files.append(wav_path)
         return wav_path
-    
-    def _fallback_transcription(self, audio_path: str) -> str:
-        """Fallback using SpeechRecognition"""
-        with sr.AudioFile(audio_path) as source:
-            audio_data = self.recognizer.record(source)
-            try:
-                text = self.recognizer.recognize_google(audio_data)
-                return text
-            except sr.UnknownValueError:
-                return "Could not understand audio"
-            except sr.RequestError as e:
-                return f"Recognition error: {e}"
\ No newline at end of file
+
+    def _fallback_transcription(self, audio_path: str, model_size: str) -> str:
+        """Fallback using the configured secondary engine"""
+        fallback = self.config.TRANSCRIPTION_FALLBACK_ENGINE
+        if fallback == self.engine_name:
+            return "Could not understand audio"
+        try:
+            return get_engine(fallback, model_size).transcribe(audio_path)
+        except Exception as e:
+            return f"Recognition error: {e}"
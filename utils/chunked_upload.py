@@ -0,0 +1,105 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+from typing import BinaryIO, Dict, Tuple
+
+# Size of the blocks copied from the request stream to disk
+BLOCK_SIZE = 1024 * 1024
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# Running SHA-256 per upload, with the offset it covers, so finalizing never has
+# to re-read the whole file. Each worker process has its own copy, so the offset is
+# checked against the committed one before every use and rebuilt from disk on mismatch.
+_hashers: Dict[str, Tuple['hashlib._Hash', int]] = {}
+_hashers_lock = threading.Lock()
+
+
+def parse_content_range(header: str) -> Tuple[int, int, int]:
+    """Parse 'bytes start-end/total' into (start, end, total)"""
+    match = _CONTENT_RANGE.match(header.strip())
+    if not match:
+        raise ValueError('Content-Range must look like "bytes start-end/total"')
+    start, end, total = (int(group) for group in match.groups())
+    if start > end or end >= total:
+        raise ValueError('Content-Range is out of bounds')
+    return start, end, total
+
+
+def preallocate(path: str, size: int):
+    """Create the target file at its final size up front"""
+    with open(path, 'wb') as f:
+        if size and hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            f.truncate(size)
+
+
+def has_space_for(folder: str, size: int, reserved: int, max_reserved: int, min_free: int) -> bool:
+    """True if preallocating `size` more bytes stays within the reservation limit and free disk space"""
+    if max_reserved and reserved + size > max_reserved:
+        return False
+    return shutil.disk_usage(folder).free - size >= min_free
+
+
+def _hasher(upload_id: str, path: str, offset: int):
+    """Return a hash of the first `offset` bytes, rebuilding it from disk if the cached one is stale"""
+    with _hashers_lock:
+        cached = _hashers.pop(upload_id, None)
+    if cached is not None and cached[1] == offset:
+        return cached[0]
+
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = offset
+        while remaining:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def write_chunk(upload_id: str, path: str, offset: int, stream: BinaryIO, length: int) -> int:
+    """Copy up to `length` bytes from `stream` into `path` at `offset`.
+
+    The caller must hold the upload's claim and pass the committed offset.
+    Returns the number of bytes written. A dropped connection simply ends the
+    copy early, so the caller can record the partial progress and let the
+    client resume from there.
+    """
+    hasher = _hasher(upload_id, path, offset)
+    written = 0
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            try:
+                block = stream.read(min(BLOCK_SIZE, length - written))
+            except Exception as e:
+                print(f"Upload {upload_id} interrupted: {e}")
+                break
+            if not block:
+                break
+            f.write(block)
+            hasher.update(block)
+            written += len(block)
+
+    with _hashers_lock:
+        _hashers[upload_id] = (hasher, offset + written)
+    return written
+
+
+def finalize(upload_id: str, path: str, offset: int) -> str:
+    """Return the SHA-256 of the completed upload and release its state"""
+    digest = _hasher(upload_id, path, offset).hexdigest()
+    discard(upload_id)
+    return digest
+
+
+def discard(upload_id: str):
+    """Forget the in-memory state of an upload"""
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
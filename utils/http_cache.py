@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+}
+
+
+def content_version(*parts) -> str:
+    """Short stable hash of the values that identify a version of some content"""
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def directory_version(path: str) -> str:
+    """Version of a directory's files (e.g. templates), so a deploy changes every ETag"""
+    stamps = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            stamps.append(os.stat(os.path.join(root, name)).st_mtime_ns)
+    return content_version(max(stamps, default=0), len(stamps))
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Pick the best Content-Encoding the client accepts"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _etag_for(base: str, encoding: Optional[str]) -> str:
+    # Each encoding is a different representation, so it needs its own strong ETag
+    return f"{base}-{encoding}" if encoding else base
+
+
+class ResponseCache:
+    """In-process LRU cache of rendered responses and their compressed variants.
+
+    Entries are keyed by a caller-chosen key and stamped with a content version;
+    a lookup with a different version is treated as a miss.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, version: str, body: bytes, mimetype: str) -> Dict:
+        entry = {'version': version, 'mimetype': mimetype, 'variants': {None: body}}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def cached_response(cache: ResponseCache, key: str, version: str, render: Callable[[], str],
+                    mimetype: str, min_size: int, cache_control: str = 'no-cache') -> Response:
+    """Serve a rendered body from the cache, answering conditional GETs with 304.
+
+    The encoding is negotiated first so the ETag compared against If-None-Match
+    (and sent back on the 304) is the one for the representation this client gets.
+    """
+    entry = cache.get(key, version)
+    if entry is None:
+        entry = cache.set(key, version, render().encode('utf-8'), mimetype)
+
+    body = entry['variants'][None]
+    encoding = negotiate_encoding() if len(body) >= min_size else None
+    etag = _etag_for(f"{key.split(':', 1)[0]}-{version}", encoding)
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        if encoding:
+            if encoding not in entry['variants']:
+                entry['variants'][encoding] = compress(body, encoding)
+            body = entry['variants'][encoding]
+        response = Response(body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_compression(app):
+    """Compress large text responses that were not already compressed by a view"""
+    min_size = app.config['COMPRESS_MIN_SIZE']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        encoding = negotiate_encoding() if len(data) >= min_size else None
+        if not encoding:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(_etag_for(etag, encoding), weak)
+        return response
+
+
+def init_static_caching(app):
+    """Serve static/ with long-lived cache headers and cache-busting URLs"""
+    max_age = app.config['STATIC_MAX_AGE']
+
+    @app.url_defaults
+    def static_cache_buster(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            try:
+                values['v'] = int(os.stat(os.path.join(app.static_folder, values['filename'])).st_mtime)
+            except OSError:
+                pass
+
+    @app.after_request
+    def static_cache_headers(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.no_cache = None
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,380 @@
+import hashlib
+import os
+import shutil
+import uuid
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy.exc import IntegrityError
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: fall back to the in-process lock only
+    fcntl = None
+
+SOURCE = 'source'
+INTERMEDIATE = 'intermediate'
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _remove(path: str) -> int:
+    """Delete a file and return the number of bytes reclaimed"""
+    size = _file_size(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        print(f"Could not remove {path}: {e}")
+        return 0
+    return size
+
+
+class StorageManager:
+    """Tracks files stored per meeting and keeps the upload folder within its quota and retention policy"""
+
+    def __init__(self, app, db, meeting_model, meeting_file_model, upload_model):
+        self.app = app
+        self.db = db
+        self.Meeting = meeting_model
+        self.MeetingFile = meeting_file_model
+        self.Upload = upload_model
+        self.last_report = None
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def folder(self) -> str:
+        return self.app.config['UPLOAD_FOLDER']
+
+    @contextmanager
+    def pin(self, *paths: str):
+        """Protect files that are still being processed from garbage collection in any worker.
+
+        Pins are marker files under UPLOAD_FOLDER/.pins so every process sees them;
+        markers left behind by a crashed worker stop counting after STORAGE_PIN_TIMEOUT.
+        """
+        markers = [self._pin_marker(p) for p in paths if p]
+        os.makedirs(os.path.join(self.folder, '.pins'), exist_ok=True)
+        for marker in markers:
+            with open(marker, 'w'):
+                pass
+        try:
+            yield
+        finally:
+            for marker in markers:
+                _remove(marker)
+
+    def track(self, meeting_id: str, path: str, kind: str = SOURCE):
+        """Record a file that belongs to a meeting (caller commits the session)"""
+        if not path or not os.path.exists(path):
+            return
+        if self.MeetingFile.query.filter_by(path=path).first() is not None:
+            return
+        self.db.session.add(self.MeetingFile(
+            meeting_id=meeting_id,
+            path=path,
+            kind=kind,
+            size=_file_size(path)
+        ))
+
+    def touch(self, meeting_id: str):
+        """Mark a meeting's source media as used, for LRU eviction"""
+        now = datetime.utcnow()
+        # Throttled so frequently viewed meetings don't cost a write per request
+        self.MeetingFile.query.filter(
+            self.MeetingFile.meeting_id == meeting_id,
+            self.MeetingFile.kind == SOURCE,
+            self.MeetingFile.last_accessed < now - timedelta(seconds=self.app.config['STORAGE_TOUCH_INTERVAL'])
+        ).update({'last_accessed': now}, synchronize_session=False)
+        self.db.session.commit()
+
+    def remove_intermediates(self, meeting_id: str) -> int:
+        """Delete derived files (e.g. converted WAVs) once the transcript is saved"""
+        files = self.MeetingFile.query.filter_by(meeting_id=meeting_id, kind=INTERMEDIATE).all()
+        return self._delete_files(files)
+
+    def delete_meeting_files(self, meeting) -> int:
+        """Delete every file tracked for a meeting (caller commits the session)"""
+        files = self.MeetingFile.query.filter_by(meeting_id=meeting.id).all()
+        reclaimed = self._delete_files(files, commit=False)
+        if meeting.file_path and os.path.exists(meeting.file_path):
+            reclaimed += _remove(meeting.file_path)
+        return reclaimed
+
+    def usage(self) -> int:
+        """Total bytes currently stored in the upload folder"""
+        total = 0
+        for entry in self._scan():
+            total += entry.stat().st_size
+        return total
+
+    def collect(self) -> Optional[Dict[str, Any]]:
+        """Run one garbage collection pass and return what was reclaimed.
+
+        Returns None if another thread or worker process is already collecting.
+        """
+        with self._exclusive() as acquired:
+            if not acquired:
+                return None
+            report = {
+                'stale_uploads': 0,
+                'intermediates': 0,
+                'orphans': 0,
+                'expired': 0,
+                'evicted': 0,
+                'legacy_moved': 0,
+                'legacy_removed': 0,
+                'reclaimed_bytes': 0,
+            }
+            self._migrate_legacy(report)
+            self._backfill()
+            self._collect_stale_uploads(report)
+            self._collect_intermediates(report)
+            self._collect_orphans(report)
+            self._collect_expired(report)
+            self._enforce_quota(report)
+            report['usage_bytes'] = self.usage()
+            report['finished_at'] = datetime.utcnow().isoformat()
+            self.last_report = report
+            return report
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the GC lock for this process and, via flock, across worker processes"""
+        if not self._run_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            os.makedirs(self.folder, exist_ok=True)
+            with open(os.path.join(self.folder, '.storage-gc.lock'), 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._run_lock.release()
+
+    def start(self):
+        """Run garbage collection periodically in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='storage-gc', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        interval = self.app.config['STORAGE_GC_INTERVAL']
+        while True:
+            time.sleep(interval)
+            with self.app.app_context():
+                try:
+                    report = self.collect()
+                    if report and report['reclaimed_bytes']:
+                        print(f"Storage GC reclaimed {report['reclaimed_bytes']} bytes: {report}")
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Storage GC failed: {e}")
+
+    def _scan(self) -> Iterable[os.DirEntry]:
+        if not os.path.isdir(self.folder):
+            return []
+        # Dotfiles are the GC lock and pin markers, not stored media
+        return [entry for entry in os.scandir(self.folder) if entry.is_file() and not entry.name.startswith('.')]
+
+    def _pin_marker(self, path: str) -> str:
+        name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, '.pins', name)
+
+    def _is_pinned(self, path: str) -> bool:
+        try:
+            pinned_at = os.path.getmtime(self._pin_marker(path))
+        except OSError:
+            return False
+        return pinned_at > time.time() - self.app.config['STORAGE_PIN_TIMEOUT']
+
+    def _delete_files(self, files, commit: bool = True) -> int:
+        reclaimed = 0
+        for meeting_file in files:
+            if self._is_pinned(meeting_file.path):
+                continue
+            reclaimed += _remove(meeting_file.path)
+            self.db.session.delete(meeting_file)
+        if commit:
+            self.db.session.commit()
+        return reclaimed
+
+    def _release_sources(self, files, report: Dict[str, Any], key: str):
+        """Delete source media whose transcript is already stored"""
+        for meeting_file in files:
+            if self._is_pinned(meeting_file.path):
+                continue
+            report['reclaimed_bytes'] += _remove(meeting_file.path)
+            report[key] += 1
+            meeting = self.db.session.get(self.Meeting, meeting_file.meeting_id)
+            if meeting and meeting.file_path == meeting_file.path:
+                meeting.file_path = None
+            self.db.session.delete(meeting_file)
+        self.db.session.commit()
+
+    def _migrate_legacy(self, report: Dict[str, Any]):
+        """Move media out of the old, web-served upload folder and delete what nothing uses.
+
+        Tracked sources are moved into UPLOAD_FOLDER (updating Meeting.file_path and
+        MeetingFile.path); leftover WAVs and other untracked files are deleted. Once the
+        folder is empty it is removed, so later passes skip this step.
+        """
+        for folder in self.app.config['LEGACY_UPLOAD_FOLDERS']:
+            legacy = os.path.abspath(os.path.join(self.app.root_path, folder))
+            if not os.path.isdir(legacy) or legacy == os.path.abspath(self.folder):
+                continue
+
+            def in_legacy(path):
+                return bool(path) and os.path.dirname(os.path.abspath(path)) == legacy
+
+            for meeting in self.Meeting.query.filter(self.Meeting.file_path.isnot(None)):
+                if not in_legacy(meeting.file_path) or self._is_pinned(meeting.file_path):
+                    continue
+                files = self.MeetingFile.query.filter_by(path=meeting.file_path).all()
+                if os.path.exists(meeting.file_path):
+                    os.makedirs(self.folder, exist_ok=True)
+                    new_path = os.path.join(
+                        self.folder, f"{uuid.uuid4().hex[:8]}_{os.path.basename(meeting.file_path)}"
+                    )
+                    shutil.move(meeting.file_path, new_path)
+                    report['legacy_moved'] += 1
+                else:
+                    new_path = None
+                for meeting_file in files:
+                    if new_path:
+                        meeting_file.path = new_path
+                    else:
+                        self.db.session.delete(meeting_file)
+                meeting.file_path = new_path
+                # Commit per file so a crash never leaves a moved file unreferenced
+                self.db.session.commit()
+
+            # Anything still tracked there is an intermediate; everything else is an orphan
+            for meeting_file in self.MeetingFile.query.all():
+                if in_legacy(meeting_file.path) and not self._is_pinned(meeting_file.path):
+                    self.db.session.delete(meeting_file)
+            self.db.session.commit()
+
+            for entry in os.scandir(legacy):
+                if entry.is_file() and not self._is_pinned(entry.path):
+                    report['reclaimed_bytes'] += _remove(entry.path)
+                    report['legacy_removed'] += 1
+            try:
+                os.rmdir(legacy)
+            except OSError:
+                pass
+
+    def _backfill(self):
+        """Start tracking source files of meetings saved before tracking existed"""
+        tracked = {path for (path,) in self.db.session.query(self.MeetingFile.path)}
+        for meeting in self.Meeting.query.filter(self.Meeting.file_path.isnot(None)):
+            if meeting.file_path not in tracked:
+                meeting_file = self.MeetingFile(
+                    meeting_id=meeting.id,
+                    path=meeting.file_path,
+                    kind=SOURCE,
+                    size=_file_size(meeting.file_path),
+                    created_at=meeting.created_at,
+                    last_accessed=meeting.created_at
+                )
+                self.db.session.add(meeting_file)
+                tracked.add(meeting.file_path)
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # Tracked concurrently by a request; the next pass picks up anything left
+            self.db.session.rollback()
+
+    def _collect_stale_uploads(self, report: Dict[str, Any]):
+        """Drop chunked uploads that stopped receiving data"""
+        cutoff = time.time() - self.app.config['UPLOAD_EXPIRY_HOURS'] * 3600
+        for upload in self.Upload.query.all():
+            if upload.status == 'complete':
+                # The file now belongs to the meeting; only the status row expires
+                if upload.created_at < datetime.utcfromtimestamp(cutoff):
+                    self.db.session.delete(upload)
+                continue
+            if upload.claim_token is not None:
+                # Being written or processed; an abandoned claim expires on its own first
+                continue
+            try:
+                modified = os.path.getmtime(upload.file_path)
+            except OSError:
+                modified = 0
+            if modified < cutoff:
+                report['reclaimed_bytes'] += _remove(upload.file_path)
+                report['stale_uploads'] += 1
+                self.db.session.delete(upload)
+        self.db.session.commit()
+
+    def _collect_intermediates(self, report: Dict[str, Any]):
+        files = [
+            meeting_file for meeting_file in self.MeetingFile.query.filter_by(kind=INTERMEDIATE)
+            if not self._is_pinned(meeting_file.path)
+        ]
+        report['reclaimed_bytes'] += self._delete_files(files)
+        report['intermediates'] += len(files)
+
+    def _collect_orphans(self, report: Dict[str, Any]):
+        """Delete files no meeting or upload refers to, after a grace period"""
+        referenced = {os.path.abspath(path) for (path,) in self.db.session.query(self.MeetingFile.path)}
+        referenced.update(os.path.abspath(path) for (path,) in self.db.session.query(self.Upload.file_path))
+        cutoff = time.time() - self.app.config['STORAGE_ORPHAN_GRACE_SECONDS']
+
+        for entry in self._scan():
+            path = os.path.abspath(entry.path)
+            if path in referenced or self._is_pinned(path) or entry.stat().st_mtime > cutoff:
+                continue
+            report['reclaimed_bytes'] += _remove(path)
+            report['orphans'] += 1
+
+    def _collect_expired(self, report: Dict[str, Any]):
+        retention_days = self.app.config['STORAGE_RETENTION_DAYS']
+        if not retention_days:
+            return
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        files = self.MeetingFile.query.filter(
+            self.MeetingFile.kind == SOURCE,
+            self.MeetingFile.created_at < cutoff
+        ).all()
+        self._release_sources(files, report, 'expired')
+
+    def _enforce_quota(self, report: Dict[str, Any]):
+        """Evict least recently used source media until usage fits the quota"""
+        quota = self.app.config['STORAGE_QUOTA_BYTES']
+        usage = self.usage()
+        if not quota or usage <= quota:
+            return
+
+        evict = []
+        candidates = self.MeetingFile.query.filter_by(kind=SOURCE).order_by(
+            self.MeetingFile.last_accessed.asc()
+        )
+        for meeting_file in candidates:
+            if usage <= quota:
+                break
+            if self._is_pinned(meeting_file.path):
+                continue
+            evict.append(meeting_file)
+            usage -= _file_size(meeting_file.path)
+        self._release_sources(evict, report, 'evicted')
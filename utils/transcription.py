@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import Config
+
+# Whisper model tiers ordered from fastest/least accurate to slowest/most accurate
+MODEL_TIERS = ['tiny', 'base', 'small', 'medium', 'large']
+DEFAULT_MODEL_SIZE = 'base'
+DEFAULT_AUTO_MAX_TIER = 'small'
+
+# Loaded models are shared across requests; loading is far more expensive than transcribing.
+# Kept as a small LRU because callers can pick any engine/size and each model is large.
+_model_cache: 'OrderedDict[Tuple[str, str], Any]' = OrderedDict()
+_model_lock = threading.Lock()
+
+
+def _load_model(key: Tuple[str, str], loader: Callable[[], Any]) -> Any:
+    """Load a model once per (engine, size), keeping at most TRANSCRIPTION_MODEL_CACHE_SIZE loaded"""
+    with _model_lock:
+        if key in _model_cache:
+            _model_cache.move_to_end(key)
+            return _model_cache[key]
+        # Evict before loading so the old and new model are never both resident
+        while _model_cache and len(_model_cache) >= max(Config().TRANSCRIPTION_MODEL_CACHE_SIZE, 1):
+            _model_cache.popitem(last=False)
+        model = loader()
+        _model_cache[key] = model
+        return model
+
+
+def _jobs_folder() -> str:
+    return os.path.join(Config().UPLOAD_FOLDER, '.jobs')
+
+
+def queue_depth(exclude: Optional[str] = None) -> int:
+    """Number of transcriptions in progress across all worker processes.
+
+    Each running job holds a marker file under UPLOAD_FOLDER/.jobs; markers older
+    than TRANSCRIPTION_JOB_TIMEOUT (left by a killed worker) are not counted.
+    """
+    cutoff = time.time() - Config().TRANSCRIPTION_JOB_TIMEOUT
+    try:
+        entries = list(os.scandir(_jobs_folder()))
+    except FileNotFoundError:
+        return 0
+
+    depth = 0
+    for entry in entries:
+        if entry.name == exclude:
+            continue
+        try:
+            if entry.stat().st_mtime > cutoff:
+                depth += 1
+        except FileNotFoundError:
+            continue
+    return depth
+
+
+@contextmanager
+def track_job():
+    """Count a transcription towards the shared queue depth while it runs; yields its job id"""
+    job_id = uuid.uuid4().hex
+    folder = _jobs_folder()
+    os.makedirs(folder, exist_ok=True)
+    marker = os.path.join(folder, job_id)
+    with open(marker, 'w'):
+        pass
+    try:
+        yield job_id
+    finally:
+        try:
+            os.remove(marker)
+        except FileNotFoundError:
+            pass
+
+
+def get_audio_duration(audio_path: str) -> Optional[float]:
+    """Return audio duration in seconds without decoding the whole file"""
+    try:
+        if audio_path.lower().endswith('.wav'):
+            import wave
+            with wave.open(audio_path, 'rb') as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        from pydub.utils import mediainfo
+        return float(mediainfo(audio_path)['duration'])
+    except Exception as e:
+        print(f"Could not read duration of {audio_path}: {e}")
+        return None
+
+
+def validate_tier(value: Optional[str], setting: str, allow_auto: bool = False) -> Optional[str]:
+    """Return a configured model size if it is known, otherwise warn and return None"""
+    if value is None or value in MODEL_TIERS or (allow_auto and value == 'auto'):
+        return value
+    print(f"Ignoring unknown model size {value!r} in {setting}")
+    return None
+
+
+def model_size_for_meeting_type(meeting_type: Optional[str]) -> Optional[str]:
+    """Model size configured for a meeting type, if any"""
+    mapping = Config().TRANSCRIPTION_MODEL_BY_MEETING_TYPE
+    if not isinstance(mapping, dict):
+        print("Ignoring TRANSCRIPTION_MODEL_BY_MEETING_TYPE: expected a JSON object")
+        return None
+    return validate_tier(mapping.get(meeting_type), 'TRANSCRIPTION_MODEL_BY_MEETING_TYPE', allow_auto=True)
+
+
+def select_model_tier(duration: Optional[float], depth: int, ceiling: Optional[str] = None) -> str:
+    """Pick a model tier, stepping down for long audio and a busy queue"""
+    config = Config()
+    ceiling = (
+        ceiling
+        or validate_tier(config.TRANSCRIPTION_AUTO_MAX_TIER, 'TRANSCRIPTION_AUTO_MAX_TIER')
+        or DEFAULT_AUTO_MAX_TIER
+    )
+    index = MODEL_TIERS.index(ceiling)
+
+    if duration and duration > config.TRANSCRIPTION_LONG_AUDIO_SECONDS:
+        index -= 1
+    if depth >= config.TRANSCRIPTION_BUSY_QUEUE_DEPTH:
+        index -= 1
+    if depth >= 2 * config.TRANSCRIPTION_BUSY_QUEUE_DEPTH:
+        index -= 1
+
+    return MODEL_TIERS[max(index, 0)]
+
+
+class TranscriptionEngine:
+    """Base class for speech-to-text backends"""
+    name = None
+
+    def __init__(self, model_size: str = 'base'):
+        self.model_size = model_size
+
+    def load(self):
+        """Load the underlying model ahead of the first transcription"""
+        return None
+
+    def transcribe(self, audio_path: str) -> str:
+        raise NotImplementedError
+
+
+class WhisperEngine(TranscriptionEngine):
+    """openai-whisper running in float32 on CPU"""
+    name = 'whisper'
+
+    def load(self):
+        import whisper
+        return _load_model(
+            (self.name, self.model_size),
+            lambda: whisper.load_model(self.model_size, device='cpu')
+        )
+
+    def transcribe(self, audio_path: str) -> str:
+        model = self.load()
+        result = model.transcribe(audio_path, fp16=False)
+        return result["text"]
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """faster-whisper (CTranslate2) with int8 quantized weights on CPU"""
+    name = 'faster-whisper'
+
+    def load(self):
+        from faster_whisper import WhisperModel
+        config = Config()
+        return _load_model(
+            (self.name, self.model_size),
+            lambda: WhisperModel(
+                self.model_size,
+                device='cpu',
+                compute_type=config.TRANSCRIPTION_COMPUTE_TYPE,
+                cpu_threads=config.TRANSCRIPTION_CPU_THREADS
+            )
+        )
+
+    def transcribe(self, audio_path: str) -> str:
+        model = self.load()
+        segments, _ = model.transcribe(audio_path, beam_size=1, vad_filter=True)
+        return ''.join(segment.text for segment in segments).strip()
+
+
+class GoogleEngine(TranscriptionEngine):
+    """SpeechRecognition's Google Web Speech API (requires network, ignores model size)"""
+    name = 'google'
+
+    def transcribe(self, audio_path: str) -> str:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(audio_path) as source:
+            audio_data = recognizer.record(source)
+            try:
+                return recognizer.recognize_google(audio_data)
+            except sr.UnknownValueError:
+                return "Could not understand audio"
+            except sr.RequestError as e:
+                return f"Recognition error: {e}"
+
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+    GoogleEngine.name: GoogleEngine,
+}
+
+
+def get_engine(name: str, model_size: str = 'base') -> TranscriptionEngine:
+    """Instantiate a transcription engine by name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}")
+    if model_size not in MODEL_TIERS:
+        raise ValueError(f"Unknown model size: {model_size}")
+    return ENGINES[name](model_size)